@@ -1,24 +1,85 @@
-import json
+import asyncio
+import hashlib
+import heapq
+import html
+import logging
+import mimetypes
 import os
+import re
+import secrets
+import shutil
 import threading
 import time
-import uuid
-from datetime import datetime, timedelta
-from pathlib import Path
-
-from fastapi import BackgroundTasks, FastAPI, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse, HTMLResponse
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path, PureWindowsPath
+from typing import BinaryIO
+from urllib.parse import quote
+
+import orjson
+from fastapi import BackgroundTasks, FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
+from readerwriterlock.rwlock import RWLockFair
+
+try:
+    from liburing import (
+        Ring,
+        io_uring_cq_advance,
+        io_uring_get_sqe,
+        io_uring_prep_unlink,
+        io_uring_queue_exit,
+        io_uring_queue_init,
+        io_uring_submit_and_wait,
+    )
+except ImportError:  # liburing is Linux-only and optional; fall back to one unlink() per file.
+    Ring = None
 
 APP_HOST = "0.0.0.0"
 APP_PORT = 8000
 STORAGE_DIR = Path("storage")
 METADATA_FILE = Path("file_metadata.json")
+JOURNAL_FILE = Path("file_metadata.log")
+JOURNAL_ROTATED_FILE = Path("file_metadata.log.old")
+JOURNAL_COMPACT_RATIO = 10
+JOURNAL_FLUSH_WINDOW_SECONDS = 0.005
+# Pretty-print the metadata snapshot for inspection; off by default since indenting inflates size and dump time.
+METADATA_DEBUG = os.environ.get("METADATA_DEBUG", "") == "1"
 DEFAULT_EXPIRE_DAYS = 7
-CLEANUP_INTERVAL_SECONDS = 10 * 60
-
-app = FastAPI(title="Primex Secure Transfer")
-_metadata_lock = threading.Lock()
+MAX_EXPIRE_DAYS = 365
+CLEANUP_INTERVAL_SECONDS = 60
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+UNLINK_BATCH_SIZE = 256
+FILE_PAGE_CACHE_SIZE = 1024
+METADATA_LOCK_STRIPES = 64
+# When set (e.g. "/internal/"), downloads are handed to nginx via X-Accel-Redirect so it can sendfile() from storage.
+ACCEL_REDIRECT_PREFIX = os.environ.get("ACCEL_REDIRECT_PREFIX", "")
+
+logger = logging.getLogger(__name__)
+app = FastAPI(title="Primex Secure Transfer", default_response_class=ORJSONResponse)
+# Lookups take the read side. Single-entry mutations take the read side plus that entry's stripe lock, so different
+# IDs never contend (each dict/heap operation is atomic under the GIL). Whole-index work (load, sweep, compaction)
+# takes the write side. Generate a fresh rlock/wlock per acquisition, the generated lock objects carry per-holder
+# state and must not be shared between threads.
+_metadata_lock = RWLockFair()
+_stripe_locks = [threading.Lock() for _ in range(METADATA_LOCK_STRIPES)]
+# Authoritative in-memory index; file_metadata.json is a snapshot and file_metadata.log an append-only journal on top of it.
+# The index is per-process, so the app must run as a single uvicorn worker per storage directory.
+_METADATA: dict[str, dict] = {}
+_journal_entries = 0
+# Serializes journal writes against compaction, which replaces the journal file.
+_journal_lock = threading.Lock()
+# Created on startup; entries are (record, future or None) pairs drained by _journal_flusher.
+_journal_queue: asyncio.Queue | None = None
+_journal_loop: asyncio.AbstractEventLoop | None = None
+_journal_task: asyncio.Task | None = None
+_cleanup_task: asyncio.Task | None = None
+# (expires_at, file_id) min-heap; entries for files that were deleted or re-put are skipped lazily on pop.
+_expiry_heap: list[tuple[float, str]] = []
+
+
+def _lock_for(file_id: str) -> threading.Lock:
+    return _stripe_locks[hash(file_id) % METADATA_LOCK_STRIPES]
 
 
 class UploadResponse(BaseModel):
@@ -28,147 +89,379 @@ class UploadResponse(BaseModel):
     expires_at: datetime
 
 
+def _replay_journal(path: Path, data: dict) -> int:
+    """Apply a journal's entries to data and return how many there were."""
+    if not path.exists():
+        return 0
+    applied = 0
+    good_bytes = 0
+    with path.open("r+b") as f:
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("unterminated journal line")
+                entry = orjson.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-append; everything before it is intact. Cut it off so
+                # later appends start on a clean line instead of being glued onto the fragment.
+                f.truncate(good_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+                break
+            if entry["op"] == "put":
+                data[entry["file_id"]] = entry["info"]
+            elif entry["op"] == "del":
+                data.pop(entry["file_id"], None)
+            applied += 1
+            good_bytes += len(line)
+    return applied
+
+
 def _load_metadata() -> dict:
-    if not METADATA_FILE.exists():
-        return {}
-    with METADATA_FILE.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    """Read the snapshot and replay the journal on top of it."""
+    global _journal_entries
+    data = {}
+    if METADATA_FILE.exists():
+        data = orjson.loads(METADATA_FILE.read_bytes())
+    # A rotated journal left by an interrupted compaction predates the live one, so it is replayed first.
+    _journal_entries = _replay_journal(JOURNAL_ROTATED_FILE, data) + _replay_journal(JOURNAL_FILE, data)
+    for file_id, info in data.items():
+        # Older stores persisted expires_at as a naive UTC ISO string; the index keeps epoch seconds.
+        if isinstance(info["expires_at"], str):
+            info["expires_at"] = datetime.fromisoformat(info["expires_at"]).replace(tzinfo=timezone.utc).timestamp()
+        # Older stores embedded the original name on disk as "<file_id>_<name>" (paths may use either separator).
+        if "name" not in info:
+            info["name"] = PureWindowsPath(info["path"]).name[len(file_id) + 1:]
+    return data
+
+
+def _dump_metadata(data: dict) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 if METADATA_DEBUG else None)
 
 
 def _save_metadata(data: dict) -> None:
-    with METADATA_FILE.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, default=str)
+    _write_snapshot(_dump_metadata(data))
+
+
+def _write_snapshot(content: bytes) -> None:
+    # Write next to the target and swap it in, so a crash never leaves a truncated snapshot behind.
+    tmp = METADATA_FILE.with_suffix(".json.tmp")
+    with tmp.open("wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, METADATA_FILE)
+
+
+def _write_journal(entries: list[dict]) -> None:
+    global _journal_entries
+    with _journal_lock:
+        with JOURNAL_FILE.open("ab") as f:
+            f.writelines(orjson.dumps(entry) + b"\n" for entry in entries)
+            f.flush()
+            os.fsync(f.fileno())
+        _journal_entries += len(entries)
+
 
+def _append_journal(entry: dict) -> asyncio.Future | None:
+    """Queue an entry for the flusher task.
 
-def _cleanup_expired_files() -> None:
+    Called on the event loop, returns a future that resolves once the entry is fsync'ed. Called from a worker thread,
+    the entry is handed over without waiting: those are deletions, which are safe to lose and redo on restart.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _journal_loop.call_soon_threadsafe(_journal_queue.put_nowait, (entry, None))
+        return None
+    done = loop.create_future()
+    _journal_queue.put_nowait((entry, done))
+    return done
+
+
+async def _journal_flusher() -> None:
+    """Coalesce entries queued within JOURNAL_FLUSH_WINDOW_SECONDS into one write and one fsync."""
+    loop = asyncio.get_running_loop()
     while True:
-        time.sleep(CLEANUP_INTERVAL_SECONDS)
-        with _metadata_lock:
-            metadata = _load_metadata()
-            now = datetime.utcnow()
-            updated = {}
-            for file_id, info in metadata.items():
-                expires_at = datetime.fromisoformat(info["expires_at"])
-                file_path = Path(info["path"])
-                if expires_at <= now or not file_path.exists():
-                    try:
-                        file_path.unlink(missing_ok=True)
-                    except OSError:
-                        pass
-                    continue
-                updated[file_id] = info
-            _save_metadata(updated)
+        batch = [await _journal_queue.get()]
+        await asyncio.sleep(JOURNAL_FLUSH_WINDOW_SECONDS)
+        while not _journal_queue.empty():
+            batch.append(_journal_queue.get_nowait())
+        try:
+            await loop.run_in_executor(None, _write_journal, [entry for entry, _ in batch])
+        except Exception as exc:
+            # Keep the flusher alive: waiting uploads get the error, and the next batch is still written.
+            logger.exception("Failed to write %d journal entries", len(batch))
+            for _, done in batch:
+                if done is not None and not done.done():
+                    done.set_exception(exc)
+        else:
+            for _, done in batch:
+                if done is not None and not done.done():
+                    done.set_result(None)
+        finally:
+            for _ in batch:
+                _journal_queue.task_done()
+
+
+def _put_metadata(file_id: str, info: dict) -> asyncio.Future | None:
+    _METADATA[file_id] = info
+    heapq.heappush(_expiry_heap, (info["expires_at"], file_id))
+    return _append_journal({"op": "put", "file_id": file_id, "info": info})
+
+
+def _delete_metadata(file_id: str) -> None:
+    if _METADATA.pop(file_id, None) is not None:
+        _append_journal({"op": "del", "file_id": file_id})
+
+
+def _compact_metadata() -> bytes | None:
+    """Capture a snapshot and rotate the journal once it dwarfs the live index.
+
+    Caller holds the _metadata_lock write side, so only the in-memory dump happens under it; the returned snapshot
+    is written by _finish_compaction after the lock is released.
+    """
+    global _journal_entries
+    if _journal_entries <= JOURNAL_COMPACT_RATIO * max(len(_METADATA), 1):
+        return None
+    with _journal_lock:
+        # Entries still queued were already applied to _METADATA, so replaying them after this snapshot is harmless.
+        snapshot = _dump_metadata(_METADATA)
+        # Until the snapshot is on disk, the rotated journal still holds everything it covers. If one is left over from
+        # a failed write, don't overwrite it; the live journal then just replays on top of the new snapshot.
+        if not JOURNAL_ROTATED_FILE.exists():
+            if JOURNAL_FILE.exists():
+                os.replace(JOURNAL_FILE, JOURNAL_ROTATED_FILE)
+            _journal_entries = 0
+    return snapshot
+
+
+def _finish_compaction(snapshot: bytes) -> None:
+    _write_snapshot(snapshot)
+    JOURNAL_ROTATED_FILE.unlink(missing_ok=True)
+
+
+def _open_unlink_ring():
+    if Ring is None:
+        return None
+    ring = Ring()
+    try:
+        io_uring_queue_init(UNLINK_BATCH_SIZE, ring)
+    except OSError:
+        # Kernel too old or io_uring disabled (e.g. by a container seccomp profile).
+        return None
+    return ring
+
+
+def _unlink_files(paths: list[str], ring=None) -> None:
+    """Delete files, ignoring ones that are already gone; batches unlinkat() submissions when an io_uring ring is given."""
+    if ring is None:
+        for path in paths:
+            try:
+                Path(path).unlink(missing_ok=True)
+            except OSError:
+                pass
+        return
+    for start in range(0, len(paths), UNLINK_BATCH_SIZE):
+        # The ring reads each path at submit time, so the batch list keeps the strings alive until then.
+        batch = paths[start:start + UNLINK_BATCH_SIZE]
+        for path in batch:
+            io_uring_prep_unlink(io_uring_get_sqe(ring), path)
+        io_uring_submit_and_wait(ring, len(batch))
+        # Per-file results are not inspected: like unlink(missing_ok=True), failures are ignored.
+        io_uring_cq_advance(ring, len(batch))
+
+
+def _cleanup_expired_files(ring=None) -> None:
+    """One sweep; holds the write lock only while updating the index, not while writing the snapshot or deleting files."""
+    expired_paths = []
+    with _metadata_lock.gen_wlock():
+        now = time.time()
+        while _expiry_heap and _expiry_heap[0][0] <= now:
+            expires_at, file_id = heapq.heappop(_expiry_heap)
+            info = _METADATA.get(file_id)
+            if not info or info["expires_at"] != expires_at:
+                continue
+            expired_paths.append(info["path"])
+            _delete_metadata(file_id)
+        snapshot = _compact_metadata()
+    try:
+        _unlink_files(expired_paths, ring)
+    except Exception:
+        # These entries are already out of the index and sweeps never rescan the disk, so nothing would retry them.
+        logger.error("Expired files may have been left on disk: %s", expired_paths)
+        raise
+    finally:
+        if snapshot is not None:
+            _finish_compaction(snapshot)
+
+
+async def _cleanup_loop() -> None:
+    loop = asyncio.get_running_loop()
+    # Sweeps run one at a time in the executor, so they can share a single ring.
+    ring = _open_unlink_ring()
+    try:
+        while True:
+            await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+            sweep = loop.run_in_executor(None, _cleanup_expired_files, ring)
+            try:
+                await asyncio.shield(sweep)
+            except asyncio.CancelledError:
+                # Let an in-flight sweep finish before its ring is torn down.
+                await sweep
+                raise
+            except Exception:
+                # Keep sweeping; a failed submission may leave the ring in an unknown state, so fall back to unlink().
+                logger.exception("Expiry cleanup sweep failed")
+                if ring is not None:
+                    io_uring_queue_exit(ring)
+                    ring = None
+    finally:
+        if ring is not None:
+            io_uring_queue_exit(ring)
 
 
 @app.on_event("startup")
-def startup_event() -> None:
+async def startup_event() -> None:
+    global _journal_queue, _journal_loop, _journal_task, _cleanup_task
+    _journal_queue = asyncio.Queue()
+    _journal_loop = asyncio.get_running_loop()
+    _journal_task = asyncio.create_task(_journal_flusher())
     STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-    if not METADATA_FILE.exists():
-        _save_metadata({})
-    threading.Thread(target=_cleanup_expired_files, daemon=True).start()
+    with _metadata_lock.gen_wlock():
+        _METADATA.clear()
+        _METADATA.update(_load_metadata())
+        _expiry_heap[:] = [(info["expires_at"], file_id) for file_id, info in _METADATA.items()]
+        heapq.heapify(_expiry_heap)
+        if not METADATA_FILE.exists():
+            _save_metadata(_METADATA)
+    _cleanup_task = asyncio.create_task(_cleanup_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    _cleanup_task.cancel()
+    try:
+        await _cleanup_task
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        # A sweep that was in flight at cancellation failed; still flush queued deletions below.
+        logger.exception("Expiry cleanup sweep failed during shutdown")
+    await _journal_queue.join()
+    _journal_task.cancel()
+
+
+def _copy_upload(src: BinaryIO, file_path: Path, size: int | None) -> None:
+    with open(file_path, "wb", buffering=0) as dest:
+        # Reserve the full size up front so the file lands in contiguous extents instead of growing write by write.
+        if size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(dest.fileno(), 0, size)
+            except OSError:
+                # Not supported by every filesystem; the copy below still works without it.
+                pass
+        shutil.copyfileobj(src, dest, UPLOAD_CHUNK_SIZE)
 
 
 @app.post("/upload", response_model=UploadResponse)
 async def upload_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), expire_days: int = DEFAULT_EXPIRE_DAYS) -> UploadResponse:
-    if expire_days <= 0:
-        raise HTTPException(status_code=400, detail="expire_days must be positive")
+    if not 0 < expire_days <= MAX_EXPIRE_DAYS:
+        raise HTTPException(status_code=400, detail=f"expire_days must be between 1 and {MAX_EXPIRE_DAYS}")
 
-    file_id = uuid.uuid4().hex
-    file_name = f"{file_id}_{file.filename}"
-    file_path = STORAGE_DIR / file_name
+    file_id = secrets.token_urlsafe(16)
+    # Shard on the ID prefix so no single directory grows to one entry per stored file.
+    file_dir = STORAGE_DIR / file_id[:2]
+    file_dir.mkdir(exist_ok=True)
+    file_path = file_dir / file_id
 
-    # Stream the upload to disk to avoid buffering very large files in memory.
-    with file_path.open("wb") as dest:
-        while chunk := await file.read(1024 * 1024):
-            dest.write(chunk)
+    # Starlette has already spooled the body; copy it from the spool file off the event loop.
+    await asyncio.get_running_loop().run_in_executor(None, _copy_upload, file.file, file_path, file.size)
 
-    expires_at = datetime.utcnow() + timedelta(days=expire_days)
-    with _metadata_lock:
-        metadata = _load_metadata()
-        metadata[file_id] = {"path": str(file_path), "expires_at": expires_at.isoformat()}
-        _save_metadata(metadata)
+    expires_at = time.time() + expire_days * 86400
+    with _metadata_lock.gen_rlock(), _lock_for(file_id):
+        journaled = _put_metadata(file_id, {"path": str(file_path), "name": file.filename, "expires_at": expires_at})
+    await journaled
 
     download_url = f"/download/{file_id}"
     view_url = f"/file/{file_id}"
     # Schedule a cleanup in case the file is already expired by the time the request completes.
     background_tasks.add_task(_remove_if_expired, file_id)
 
-    return UploadResponse(file_id=file_id, download_url=download_url, view_url=view_url, expires_at=expires_at)
+    return UploadResponse(file_id=file_id, download_url=download_url, view_url=view_url, expires_at=datetime.utcfromtimestamp(expires_at))
 
 
 def _remove_if_expired(file_id: str) -> None:
-    with _metadata_lock:
-        metadata = _load_metadata()
-        info = metadata.get(file_id)
+    with _metadata_lock.gen_rlock(), _lock_for(file_id):
+        info = _METADATA.get(file_id)
         if not info:
             return
-        expires_at = datetime.fromisoformat(info["expires_at"])
-        if expires_at <= datetime.utcnow():
+        if info["expires_at"] <= time.time():
             try:
                 Path(info["path"]).unlink(missing_ok=True)
             except OSError:
                 pass
-            metadata.pop(file_id, None)
-            _save_metadata(metadata)
+            _delete_metadata(file_id)
 
 
-@app.get("/download/{file_id}")
-def download_file(file_id: str):
-    with _metadata_lock:
-        metadata = _load_metadata()
-        info = metadata.get(file_id)
-        if not info:
-            raise HTTPException(status_code=404, detail="File not found")
-
-        expires_at = datetime.fromisoformat(info["expires_at"])
-        if expires_at <= datetime.utcnow():
+def _evict(file_id: str, info: dict) -> None:
+    """Drop an entry seen under the read lock, unless another request already replaced or removed it."""
+    with _metadata_lock.gen_rlock(), _lock_for(file_id):
+        if _METADATA.get(file_id) is not info:
+            return
+        try:
             Path(info["path"]).unlink(missing_ok=True)
-            metadata.pop(file_id, None)
-            _save_metadata(metadata)
-            raise HTTPException(status_code=410, detail="File expired")
+        except OSError:
+            pass
+        _delete_metadata(file_id)
 
-        file_path = Path(info["path"])
-        if not file_path.exists():
-            metadata.pop(file_id, None)
-            _save_metadata(metadata)
-            raise HTTPException(status_code=404, detail="File missing on disk")
 
-    return FileResponse(path=file_path, filename=file_path.name.split("_", 1)[-1])
+def _get_active_entry(file_id: str) -> dict:
+    with _metadata_lock.gen_rlock():
+        info = _METADATA.get(file_id)
+    if not info:
+        raise HTTPException(status_code=404, detail="File not found")
 
+    if info["expires_at"] <= time.time():
+        _evict(file_id, info)
+        raise HTTPException(status_code=410, detail="File expired")
+    # The index is authoritative: the file itself is only touched when it is actually served.
+    return info
 
-@app.get("/file/{file_id}", response_class=HTMLResponse)
-def file_page(file_id: str):
-    with _metadata_lock:
-        metadata = _load_metadata()
-        info = metadata.get(file_id)
-        if not info:
-            raise HTTPException(status_code=404, detail="File not found")
 
-        expires_at = datetime.fromisoformat(info["expires_at"])
-        if expires_at <= datetime.utcnow():
-            Path(info["path"]).unlink(missing_ok=True)
-            metadata.pop(file_id, None)
-            _save_metadata(metadata)
-            raise HTTPException(status_code=410, detail="File expired")
-
-        file_path = Path(info["path"])
-        if not file_path.exists():
-            metadata.pop(file_id, None)
-            _save_metadata(metadata)
-            raise HTTPException(status_code=404, detail="File missing on disk")
-
-    filename = file_path.name.split("_", 1)[-1]
-    download_link = f"/download/{file_id}"
-    expires_text = expires_at.strftime("%Y-%m-%d %H:%M UTC")
-    return f"""
+@app.get("/download/{file_id}")
+def download_file(file_id: str):
+    info = _get_active_entry(file_id)
+    file_path = Path(info["path"])
+    filename = info["name"]
+    if ACCEL_REDIRECT_PREFIX:
+        internal_path = quote(file_path.relative_to(STORAGE_DIR).as_posix())
+        # Stored files have no extension, so nginx can't infer the type; send the one FileResponse would guess.
+        return Response(
+            media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            headers={
+                "X-Accel-Redirect": f"{ACCEL_REDIRECT_PREFIX}{internal_path}",
+                "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename, safe='')}",
+            },
+        )
+    try:
+        # Handing FileResponse the stat result saves it from stat()ing the file a second time.
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        _evict(file_id, info)
+        raise HTTPException(status_code=404, detail="File missing on disk")
+    return FileResponse(path=file_path, filename=filename, stat_result=stat_result)
+
+
+_FILE_PAGE_TEMPLATE = """
     <html>
       <head>
         <title>Download {filename}</title>
         <style>
-          body {{ font-family: Arial, sans-serif; max-width: 600px; margin: 60px auto; padding: 0 20px; text-align: center; }}
-          h1 {{ margin-bottom: 0.5rem; }}
-          p {{ color: #444; }}
-          a.button {{
+          body { font-family: Arial, sans-serif; max-width: 600px; margin: 60px auto; padding: 0 20px; text-align: center; }
+          h1 { margin-bottom: 0.5rem; }
+          p { color: #444; }
+          a.button {
             display: inline-block;
             margin-top: 20px;
             padding: 10px 18px;
@@ -177,9 +470,9 @@ def file_page(file_id: str):
             border-radius: 6px;
             text-decoration: none;
             font-weight: 600;
-          }}
-          a.button:hover {{ background: #1d4ed8; }}
-          button.copy {{
+          }
+          a.button:hover { background: #1d4ed8; }
+          button.copy {
             display: inline-block;
             margin-top: 12px;
             padding: 8px 14px;
@@ -189,8 +482,8 @@ def file_page(file_id: str):
             border-radius: 6px;
             cursor: pointer;
             font-weight: 600;
-          }}
-          button.copy:hover {{ background: #0f9c75; }}
+          }
+          button.copy:hover { background: #0f9c75; }
         </style>
       </head>
       <body>
@@ -198,15 +491,31 @@ def file_page(file_id: str):
         <p>Expires at: {expires_text}</p>
         <a class="button" href="{download_link}">Download</a>
         <br />
-        <button class="copy" onclick="navigator.clipboard.writeText(window.location.href).then(()=>{{this.textContent='Copied!'; setTimeout(()=>this.textContent='Copy Link',1200);}})">Copy Link</button>
+        <button class="copy" onclick="navigator.clipboard.writeText(window.location.href).then(()=>{this.textContent='Copied!'; setTimeout(()=>this.textContent='Copy Link',1200);})">Copy Link</button>
       </body>
     </html>
     """
+# Pre-encoded template pieces around the substitution points: filename (twice), expires_text, download_link.
+_FILE_PAGE_PARTS = tuple(part.encode("utf-8") for part in re.split(r"\{(?:filename|expires_text|download_link)\}", _FILE_PAGE_TEMPLATE))
 
 
-@app.get("/", response_class=HTMLResponse)
-def landing_page() -> str:
-    return """
+# Keyed on every input, so a cached page can never go stale; expired or deleted IDs are rejected before rendering.
+@lru_cache(maxsize=FILE_PAGE_CACHE_SIZE)
+def _render_file_page(file_id: str, name: str, expires_at: float) -> bytes:
+    filename = html.escape(name).encode("utf-8")
+    download_link = f"/download/{file_id}".encode("utf-8")
+    expires_text = datetime.utcfromtimestamp(expires_at).strftime("%Y-%m-%d %H:%M UTC").encode("utf-8")
+    prefix, after_title, after_heading, after_expiry, suffix = _FILE_PAGE_PARTS
+    return b"".join((prefix, filename, after_title, filename, after_heading, expires_text, after_expiry, download_link, suffix))
+
+
+@app.get("/file/{file_id}", response_class=HTMLResponse)
+def file_page(file_id: str) -> Response:
+    info = _get_active_entry(file_id)
+    return Response(content=_render_file_page(file_id, info["name"], info["expires_at"]), media_type="text/html")
+
+
+_LANDING_HTML = """
     <html>
       <head>
         <title>Primex Secure Transfer</title>
@@ -229,7 +538,7 @@ def landing_page() -> str:
           <label>File</label>
           <input type="file" name="file" required />
           <label>Expire days (optional, default 7)</label>
-          <input type="number" name="expire_days" min="1" placeholder="7" />
+          <input type="number" name="expire_days" min="1" max="365" placeholder="7" />
           <br /><br />
           <button type="submit">Upload</button>
         </form>
@@ -269,3 +578,12 @@ def landing_page() -> str:
       </body>
     </html>
     """
+_LANDING_BYTES = _LANDING_HTML.encode("utf-8")
+_LANDING_ETAG = f'"{hashlib.md5(_LANDING_BYTES).hexdigest()}"'
+
+
+@app.get("/", response_class=HTMLResponse)
+def landing_page(request: Request) -> Response:
+    if request.headers.get("if-none-match") == _LANDING_ETAG:
+        return Response(status_code=304, headers={"ETag": _LANDING_ETAG})
+    return Response(content=_LANDING_BYTES, media_type="text/html", headers={"ETag": _LANDING_ETAG})